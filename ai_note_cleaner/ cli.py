@@ -1,90 +1,186 @@
+import argparse
 import subprocess
 import sys
-from rich.console import Console
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import prompt_toolkit
+from prompt_toolkit.validation import Validator
+from rich.console import Console, Group
 from rich.markdown import Markdown
-import markdown
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
-from tabulate import tabulate
+from rich.text import Text
+import mistune
+from mistune.core import BaseRenderer
 import re
 import html
+import hashlib
+import os
+import shelve
+import tempfile
+from pathlib import Path
+
+try:
+    # Scripting Bridge access to Notes.app stays in-process (macOS only)
+    from macnotesapp import NotesApp
+except ImportError:
+    NotesApp = None
 
 console = Console()
 
+# Enhanced bodies are cached per prompt so re-processing a note skips Perplexity
+CACHE_DIR = Path.home() / ".cache" / "ai-note-cleaner"
+ENHANCE_CACHE_PATH = CACHE_DIR / "enhance.db"
+# Read subprocess output in large chunks rather than line by line
+PIPE_BUFSIZE = 64 * 1024
 
-def markdown_to_plain_text(md_text):
+PERPLEXITY_CMD = ['python3', '/Users/ryan/.local/bin/perplexity']
+# Long-lived driver that runs the CLI once per prompt without re-spawning Python
+PERPLEXITY_WORKER = Path(__file__).with_name("perplexity_worker.py")
+
+# shelve is not safe for concurrent access from worker threads
+_cache_lock = threading.Lock()
+
+# Raw HTML blocks in the Markdown are reduced to their text
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+# Text without any of these (and without "1." style lists) renders as itself
+_MARKDOWN_CHARS = "#*`|[]-_>+=<&\\~"
+_ORDERED_LIST_RE = re.compile(r"^\s*\d+[.)](?:\s|$)", re.M)
+
+# Post-processing of the rendered text
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_BLANK_RE = re.compile(r"\n{3,}")
+_CHK = {"- [ ]": "☐", "[ ]": "☐", "- [x]": "☑", "[x]": "☑"}
+# longest keys first so "- [ ]" wins over "[ ]"; one pass over the text
+_CHECKBOX_RE = re.compile("|".join(re.escape(k) for k in sorted(_CHK, key=len, reverse=True)))
+
+
+def format_github_table(rows, headers):
     """
-    Convert Markdown to clean, readable plain text with:
-      - Uppercased headings + underlines
-      - Bullet points
-      - Nicely formatted tables (tabulate)
-      - Checkboxes prettified
-      - ANSI codes stripped
-      - Stable blank line spacing
+    Format rows as a GitHub-style pipe table with left-aligned, padded columns.
+    Like tabulate's "github" format, every column is at least two characters
+    wider than its header.
     """
-    # 1) Markdown -> HTML
-    html_str = markdown.markdown(md_text)
+    rows = [list(row) + [""] * (len(headers) - len(row)) for row in rows]
+    widths = [max([len(header) + 2] + [len(cell) for cell in col]) for header, *col in zip(headers, *rows)]
+
+    def line(cells):
+        return "| " + " | ".join(f"{cell:<{width}}" for cell, width in zip(cells, widths)) + " |"
 
-    # 2) Parse HTML
-    soup = BeautifulSoup(html_str, "html.parser")
+    separator = "|-" + "-|-".join("-" * width for width in widths) + "-|"
+    return "\n".join([line(headers), separator] + [line(row) for row in rows])
 
-    # 3) Lists -> bullets
-    for li in soup.find_all("li"):
-        # add a bullet before each list item and ensure newline after
-        li.insert_before("• ")
-        li.insert_after("\n")
 
-    # 4) Headings -> UPPERCASE + underline
-    for heading in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
-        text = heading.get_text(separator=" ", strip=True)
+class PlainRenderer(BaseRenderer):
+    """
+    Render mistune's token stream straight to plain text, so Markdown never
+    has to be turned into HTML and parsed back.
+    """
+    NAME = "plain"
+
+    def render_children(self, token, state):
+        return self.render_tokens(token.get("children", []), state)
+
+    # Inline: keep the text, drop the markup
+    def text(self, token, state):
+        return html.unescape(token["raw"])
+
+    def codespan(self, token, state):
+        return token["raw"]
+
+    def linebreak(self, token, state):
+        return "\n"
+
+    softbreak = linebreak
+
+    def inline_html(self, token, state):
+        return ""
+
+    emphasis = strong = strikethrough = link = image = render_children
+
+    # Blocks
+    def paragraph(self, token, state):
+        return self.render_children(token, state) + "\n\n"
+
+    def block_text(self, token, state):
+        return self.render_children(token, state) + "\n"
+
+    def heading(self, token, state):
+        # Headings -> UPPERCASE + underline
+        text = " ".join(self.render_children(token, state).split())
         underline = "-" * len(text)
-        heading.string = f"\n{text.upper()}\n{underline}\n"
-
-    # 5) Tables -> tabulate (GitHub style)
-    for table in soup.find_all("table"):
-        # collect headers
-        thead = table.find("thead")
-        if thead:
-            headers = [th.get_text(strip=True) for th in thead.find_all("th")]
-        else:
-            # try first row as headers if no thead
-            first_row = table.find("tr")
-            if first_row:
-                headers = [c.get_text(strip=True) for c in first_row.find_all(["th", "td"])]
+        return f"\n{text.upper()}\n{underline}\n\n"
+
+    def list(self, token, state):
+        items = self.render_children(token, state)
+        # only top-level lists are separated from what follows
+        return items + "\n" if token["attrs"]["depth"] == 0 else items
+
+    def list_item(self, token, state):
+        # Lists -> bullets
+        return "• " + self.render_children(token, state)
+
+    def task_list_item(self, token, state):
+        box = "☑" if token["attrs"]["checked"] else "☐"
+        return f"• {box} " + self.render_children(token, state)
+
+    def table(self, token, state):
+        # Tables -> GitHub-style text table
+        headers, rows = [], []
+        for part in token["children"]:
+            if part["type"] == "table_head":
+                headers = self.table_cells(part, state)
             else:
-                headers = []
+                rows.extend(self.table_cells(row, state) for row in part["children"])
+        return "\n" + format_github_table(rows, headers) + "\n\n"
 
-        # rows
-        rows = []
-        trs = table.find_all("tr")
-        # skip thead row if present
-        start_idx = 1 if (not thead and len(trs) > 0) else 0
-        for tr in trs[start_idx:]:
-            cells = [td.get_text(strip=True) for td in tr.find_all(["td", "th"])]
-            if cells:
-                rows.append(cells)
+    def table_cells(self, row, state):
+        return [self.render_children(cell, state).strip() for cell in row["children"]]
 
-        pretty = tabulate(rows, headers=headers, tablefmt="github")
-        table.replace_with("\n" + pretty + "\n")
+    def block_code(self, token, state):
+        return token["raw"] + "\n"
 
-    # 6) Extract text
-    text = soup.get_text()
+    def block_quote(self, token, state):
+        return self.render_children(token, state)
 
-    # 7) Checkboxes and minor prettifiers
+    def block_html(self, token, state):
+        return html.unescape(_HTML_TAG_RE.sub("", token["raw"]))
+
+    def blank_line(self, token, state):
+        return ""
+
+    thematic_break = block_error = blank_line
+
+
+_plain_md = mistune.create_markdown(renderer=PlainRenderer(), plugins=["table", "task_lists", "strikethrough"])
+
+
+def markdown_to_plain_text(md_text):
+    """
+    Convert Markdown to clean, readable plain text with:
+      - Uppercased headings + underlines
+      - Bullet points
+      - Nicely formatted tables (GitHub style)
+      - Checkboxes prettified
+      - ANSI codes stripped
+      - Stable blank line spacing
+    """
+    # 1) Markdown -> plain text in a single render pass (plain text is used as-is)
+    if any(c in md_text for c in _MARKDOWN_CHARS) or _ORDERED_LIST_RE.search(md_text):
+        text = _plain_md(md_text)
+    else:
+        text = md_text
+
+    # 2) Checkboxes and minor prettifiers
     # If source had markdown checkboxes, normalize them
-    text = (text
-            .replace("- [ ]", "☐")
-            .replace("[ ]", "☐")
-            .replace("- [x]", "☑")
-            .replace("[x]", "☑"))
+    text = _CHECKBOX_RE.sub(lambda m: _CHK[m.group(0)], text)
 
-    # 8) Strip any ANSI escapes (like [1;44;93m)
-    text = re.sub(r"\x1b\[[0-9;]*m", "", text)
+    # 3) Strip any ANSI escapes (like [1;44;93m)
+    text = _ANSI_RE.sub("", text)
 
-    # 9) Compact extra blank lines (keep at most 2)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # 4) Compact extra blank lines (keep at most 2)
+    text = _BLANK_RE.sub("\n\n", text)
 
-    # 10) Ensure a trailing newline for nicer <pre> rendering
+    # 5) Ensure a trailing newline for nicer <pre> rendering
     if not text.endswith("\n"):
         text += "\n"
 
@@ -96,7 +192,11 @@ def to_html_preserving_newlines(plain_text):
     Wrap plain text in a <pre> that preserves line breaks and spacing in Apple Notes.
     Also escape HTML entities to avoid accidental tag interpretation.
     """
-    escaped = html.escape(plain_text)
+    # most enhanced notes contain nothing to escape; skip the copy then
+    if any(c in plain_text for c in "<>&\"'"):
+        escaped = html.escape(plain_text)
+    else:
+        escaped = plain_text
     # Use Apple-friendly fonts (optional)
     return (
         '<pre style="white-space: pre-wrap; '
@@ -109,80 +209,378 @@ def to_html_preserving_newlines(plain_text):
 
 
 def print_banner():
-    console.print("="*50, style="bold green")
-    console.print("AI Note Cleaner CLI Application - v1.0", style="bold bright_cyan")
-    console.print("="*50, style="bold green")
-    console.print("Enhance your Apple Notes by summarizing, fixing grammar,", style="italic")
-    console.print("adding headings & bullets using Perplexity AI CLI.", style="italic")
-    console.print()
+    # one print call, so the banner is rendered and flushed in a single write
+    console.print(Group(
+        Text("="*50, style="bold green"),
+        Text("AI Note Cleaner CLI Application - v1.0", style="bold bright_cyan"),
+        Text("="*50, style="bold green"),
+        Text("Enhance your Apple Notes by summarizing, fixing grammar,", style="italic"),
+        Text("adding headings & bullets using Perplexity AI CLI.", style="italic"),
+        Text(""),
+    ))
+
+
+# Every AppleScript we run takes its parameters through argv, so each one can
+# be compiled to a .scpt once and reused (see compiled_applescript).
+APPLESCRIPTS = {
+    "list_folders": '''
+on run argv
+  tell application "Notes" to get name of every folder
+end run
+''',
+    "get_notes_in_folder": '''
+on run argv
+  set folderName to item 1 of argv
+  tell application "Notes"
+    set noteNames to name of notes of folder folderName
+    set noteBodies to body of notes of folder folderName
+  end tell
+  set out to {}
+  repeat with i from 1 to count of noteNames
+    set end of out to (item i of noteNames) & (character id 30) & (item i of noteBodies) & (character id 29)
+  end repeat
+  set AppleScript's text item delimiters to ""
+  return out as text
+end run
+''',
+    "create_note": '''
+on run argv
+  set folderName to item 1 of argv
+  set noteName to item 2 of argv
+  set theHTML to (read POSIX file (item 3 of argv) as «class utf8»)
+  tell application "Notes"
+    tell folder folderName
+      make new note with properties {name:noteName, body:theHTML}
+    end tell
+  end tell
+end run
+''',
+    "create_folder": '''
+on run argv
+  set folderName to item 1 of argv
+  tell application "Notes" to make new folder with properties {name:folderName}
+end run
+''',
+}
+
+
+def compiled_applescript(name):
+    """
+    Return the path of the compiled .scpt for APPLESCRIPTS[name], running
+    osacompile the first time it is needed. The file name carries a hash of the
+    source so edited scripts are recompiled. Returns None if compiling fails.
+    """
+    source = APPLESCRIPTS[name]
+    digest = hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+    path = CACHE_DIR / f"{name}-{digest}.scpt"
+    if path.exists():
+        return path
+    try:
+        ensure_cache_dir()
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.scpt")
+        process = subprocess.run(['osacompile', '-o', str(tmp_path), '-e', source], capture_output=True, text=True)
+        if process.returncode != 0:
+            return None
+        os.replace(tmp_path, path)
+        return path
+    except Exception:
+        return None
 
 
-def run_applescript(script):
-    process = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+def run_applescript(name, *args):
+    scpt = compiled_applescript(name)
+    if scpt is not None:
+        cmd = ['osascript', str(scpt), *args]
+    else:
+        # could not precompile; let osascript compile the source this time
+        cmd = ['osascript', '-e', APPLESCRIPTS[name], *args]
+    process = subprocess.run(cmd, capture_output=True, text=True)
     if process.returncode != 0:
         console.print(f"[red]AppleScript error:[/] {process.stderr}")
         return None
     return process.stdout.strip()
 
 
+def scripting_bridge_failed(action, error):
+    console.print(f"[yellow]Scripting Bridge could not {action} ({error}); falling back to AppleScript.[/]")
+
+
 def list_folders():
-    script = 'tell application "Notes" to get name of every folder'
-    folders = run_applescript(script)
+    if NotesApp is not None:
+        try:
+            app = NotesApp()
+            names = [f for account in app.accounts for f in app.account(account).folders]
+            return list(dict.fromkeys(f.strip() for f in names if f.strip()))
+        except Exception as e:
+            scripting_bridge_failed("list folders", e)
+
+    folders = run_applescript("list_folders")
     if folders:
         unique_folders = list(dict.fromkeys(f.strip() for f in folders.split(",") if f.strip()))
         return unique_folders
     return []
 
 
-def list_notes_in_folder(folder):
-    script = f'''
-    tell application "Notes"
-      set noteNames to name of notes of folder "{folder}"
-    end tell
-    '''
-    result = run_applescript(script)
+def get_notes_in_folder(folder):
+    """
+    Fetch every note in a folder with a single osascript run.
+    Names and bodies are read in bulk and joined with ASCII record (30) and
+    group (29) separators, so each note costs no extra process launch.
+    (macnotesapp's bulk reads fetch folder names one Apple Event per note
+    across the whole library, so Scripting Bridge is only used for writes.)
+    Returns a dict of note name -> HTML body.
+    """
+    result = run_applescript("get_notes_in_folder", folder)
+    notes = {}
     if result:
-        return [n.strip() for n in result.split(",")]
-    return []
+        for record in result.split("\x1d"):
+            name, sep, body = record.partition("\x1e")
+            name = name.strip()
+            if name:
+                # keep the first note when names repeat
+                notes.setdefault(name, body)
+    return notes
 
 
-def get_note_body(folder, note_name):
-    script = f'''
-    tell application "Notes"
-      set theNotes to notes of folder "{folder}"
-      repeat with n in theNotes
-        if name of n is "{note_name}" then
-          return body of n
-        end if
-      end repeat
-    end tell
-    '''
-    return run_applescript(script)
+# folder name -> name of the Notes account that owns it (None if not found)
+_folder_accounts = {}
+
+
+def notes_account_for_folder(folder):
+    """
+    Return the macnotesapp Account that owns folder, or None if no account
+    has it. The lookup runs once per folder.
+    """
+    if folder not in _folder_accounts:
+        app = NotesApp()
+        _folder_accounts[folder] = next(
+            (name for name in app.accounts if folder in app.account(name).folders), None
+        )
+    name = _folder_accounts[folder]
+    return NotesApp().account(name) if name is not None else None
 
 
 def create_note_in_folder_html(folder, note_name, html_body):
     """
     Create a new Apple Note with an HTML body (so line breaks are preserved).
-    We escape just the quotes for AppleScript and pass HTML directly.
+    Uses Scripting Bridge when available; otherwise AppleScript reads the HTML
+    from a temp file, so the body is never escaped into the script or argv.
     """
-    html_escaped_for_as = html_body.replace('"', '\\"')
-    script = f'''
-    tell application "Notes"
-      tell folder "{folder}"
-        make new note with properties {{name:"{note_name}", body:"{html_escaped_for_as}"}}
-      end tell
-    end tell
-    '''
-    return run_applescript(script)
+    if NotesApp is not None:
+        try:
+            account = notes_account_for_folder(folder)
+            if account is not None:
+                # macnotesapp writes the name into the body as
+                # <div><h1>{name}</h1></div> without escaping it; AppleScript
+                # sets name as a plain property, so only this path escapes.
+                account.make_note(html.escape(note_name), html_body, folder=folder)
+                return ""
+        except Exception as e:
+            scripting_bridge_failed("create note", e)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", encoding="utf-8", delete=False) as f:
+        f.write(html_body)
+    try:
+        return run_applescript("create_note", folder, note_name, f.name)
+    finally:
+        os.unlink(f.name)
+
+
+def ensure_cache_dir():
+    """
+    Create CACHE_DIR readable only by the current user: it holds enhanced
+    note contents. chmod as well, since mkdir's mode is masked by the umask
+    and does not apply to a directory that already exists.
+    """
+    CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    os.chmod(CACHE_DIR, 0o700)
+
+
+def prompt_cache_key(prompt):
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+
+def load_cached_enhancement(key):
+    try:
+        with _cache_lock, shelve.open(str(ENHANCE_CACHE_PATH), flag="r") as cache:
+            return cache.get(key)
+    except Exception:
+        # missing or unreadable cache is just a cache miss
+        return None
+
+
+def store_cached_enhancement(key, enhanced):
+    try:
+        ensure_cache_dir()
+        with _cache_lock, shelve.open(str(ENHANCE_CACHE_PATH)) as cache:
+            cache[key] = enhanced
+    except Exception as e:
+        console.print(f"[yellow]Could not update enhancement cache:[/] {e}")
+
+
+def run_perplexity(cmd, timeout=60):
+    """
+    Run the Perplexity CLI and return a CompletedProcess.
+    stdout is read in PIPE_BUFSIZE chunks and joined once at the end. stderr
+    goes to a temp file so a chatty CLI can never block on a full pipe, and a
+    watchdog kills the process if it runs past the timeout.
+    """
+    timed_out = threading.Event()
+
+    def kill(process):
+        timed_out.set()
+        process.kill()
+
+    with tempfile.TemporaryFile(mode="w+") as err, subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=err, bufsize=PIPE_BUFSIZE, text=True
+    ) as process:
+        watchdog = threading.Timer(timeout, kill, args=(process,))
+        watchdog.start()
+        try:
+            chunks = []
+            for chunk in iter(lambda: process.stdout.read(PIPE_BUFSIZE), ""):
+                chunks.append(chunk)
+            process.wait()
+        finally:
+            watchdog.cancel()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        err.seek(0)
+        return subprocess.CompletedProcess(cmd, process.returncode, "".join(chunks), err.read())
+
+
+class PerplexityWorkerError(RuntimeError):
+    """The worker could not take the request at all; a one-shot run is safe."""
+
+
+class PerplexityWorker:
+    """
+    A persistent perplexity_worker.py process, talking NUL-framed requests and
+    responses over stdin/stdout. Not thread-safe: every thread gets its own
+    worker from get_perplexity_worker().
+    """
+
+    def __init__(self):
+        self._proc = None
+
+    def _start(self):
+        try:
+            self._proc = subprocess.Popen(
+                [PERPLEXITY_CMD[0], str(PERPLEXITY_WORKER), PERPLEXITY_CMD[-1]],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                bufsize=PIPE_BUFSIZE,
+            )
+        except OSError as e:
+            raise PerplexityWorkerError(f"could not start Perplexity worker: {e}") from e
+        # the worker sends a single NUL once it is ready for requests
+        if self._proc.stdout.read(1) != b"\0":
+            self.close()
+            raise PerplexityWorkerError("Perplexity worker exited during startup")
+
+    def run(self, prompt, timeout=60):
+        """Send one prompt and return a CompletedProcess like run_perplexity()."""
+        if self._proc is None or self._proc.poll() is not None:
+            if _workers_closed.is_set():
+                raise RuntimeError("Perplexity workers are shutting down")
+            self._start()
+        proc = self._proc
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.start()
+        chunks, nuls = [], 0
+        try:
+            try:
+                proc.stdin.write(prompt.replace("\0", "").encode("utf-8") + b"\0")
+                proc.stdin.flush()
+            except OSError as e:
+                # died before it could read the prompt
+                self.close()
+                raise PerplexityWorkerError(f"Perplexity worker is not accepting requests: {e}") from e
+            # response is three NUL-terminated fields: returncode, stdout, stderr
+            while nuls < 3:
+                chunk = proc.stdout.read1(PIPE_BUFSIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                nuls += chunk.count(b"\0")
+        except OSError:
+            pass
+        finally:
+            watchdog.cancel()
+
+        if timed_out.is_set():
+            # already killed by the watchdog; reap it so no zombie is left
+            self._proc = None
+            proc.wait()
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        if nuls < 3:
+            # Died mid-request (e.g. Ctrl-C reached the whole process group).
+            # Not a PerplexityWorkerError: retrying could hang the exit or send
+            # the prompt to Perplexity twice.
+            self.close()
+            raise RuntimeError("Perplexity worker exited before answering")
+        code, out, err = b"".join(chunks).decode("utf-8").split("\0")[:3]
+        return subprocess.CompletedProcess(proc.args, int(code), out, err)
+
+    def close(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+
+
+_worker_local = threading.local()
+_workers = []
+_workers_lock = threading.Lock()
+# set by close_perplexity_workers() so in-flight threads don't start new ones
+_workers_closed = threading.Event()
+
+
+def get_perplexity_worker():
+    worker = getattr(_worker_local, "worker", None)
+    if worker is None:
+        worker = _worker_local.worker = PerplexityWorker()
+        with _workers_lock:
+            _workers.append(worker)
+    return worker
+
+
+def close_perplexity_workers():
+    _workers_closed.set()
+    with _workers_lock:
+        for worker in _workers:
+            worker.close()
+        _workers.clear()
 
 
 def enhance_text_with_perplexity(text):
     prompt = f'Summarize, fix grammar, add headings and bullet points, and rewrite cleanly:\n{text}'
+    key = prompt_cache_key(prompt)
+    cached = load_cached_enhancement(key)
+    if cached is not None:
+        return cached
     try:
-        cmd = ['python3', '/Users/ryan/.local/bin/perplexity', prompt]
-        process = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        try:
+            process = get_perplexity_worker().run(prompt, timeout=60)
+        except PerplexityWorkerError:
+            if _workers_closed.is_set():
+                return None
+            # worker could not be used; fall back to a one-shot CLI run
+            process = run_perplexity(PERPLEXITY_CMD + [prompt], timeout=60)
         if process.returncode == 0:
-            return process.stdout.strip()
+            enhanced = process.stdout.strip()
+            if enhanced:
+                store_cached_enhancement(key, enhanced)
+            return enhanced
         else:
             console.print(f"[red]Perplexity CLI error:[/] {process.stderr}")
             return None
@@ -192,16 +590,63 @@ def enhance_text_with_perplexity(text):
 
 
 def prompt_int(prompt, min_val, max_val):
+    error_message = f"Invalid input! Please enter a number between {min_val} and {max_val}."
+    if sys.stdin.isatty():
+        # validated inline, so a bad entry never leaves the prompt
+        validator = Validator.from_callable(
+            lambda val: val.strip().isdecimal() and min_val <= int(val) <= max_val,
+            error_message=error_message,
+            move_cursor_to_end=True,
+        )
+        return int(prompt_toolkit.prompt(prompt, validator=validator, validate_while_typing=False))
+
+    # piped input: plain re-prompt loop
     while True:
         val = input(prompt).strip()
-        if val.isdigit():
+        if val.isdecimal():
             num = int(val)
             if min_val <= num <= max_val:
                 return num
-        console.print(f"[red]Invalid input! Please enter a number between {min_val} and {max_val}.[/]")
+        console.print(f"[red]{error_message}[/]")
+
+
+def process_note(note_name, original_body):
+    """
+    Enhance and format one note. Safe to run in a worker thread: it does not
+    touch Notes.app. Returns (new_note_name, html_body), or None on failure.
+    """
+    console.print(f"Enhancing note: [bold]{note_name}[/] ...")
+    if not original_body.strip():
+        console.print(f"  [red]Failed to read note '{note_name}'. Skipping.[/]")
+        return None
+
+    enhanced_body = enhance_text_with_perplexity(original_body)
+    if not enhanced_body:
+        console.print(f"  [red]Failed to enhance note '{note_name}'. Skipping.[/]")
+        return None
+
+    new_note_name = f"Enhanced - {note_name}"
 
+    # Format for readability (plain text), then wrap in HTML so Notes preserves breaks
+    readable_text = markdown_to_plain_text(enhanced_body)
+    html_body = to_html_preserving_newlines(readable_text)
+    return new_note_name, html_body
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="ainotecleaner", description="AI-powered Apple Notes cleaner.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, metavar="N",
+        help="number of notes to enhance concurrently (default: 1)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
 
-def main():
+
+def main(argv=None):
+    args = parse_args(argv)
     print_banner()
 
     console.print("Fetching Apple Notes folders...\n", style="yellow")
@@ -211,8 +656,7 @@ def main():
         return
 
     console.print("Available Apple Notes folders:", style="bold cyan")
-    for idx, folder in enumerate(folders, 1):
-        console.print(f"  {idx}. {folder}")
+    console.print("\n".join(f"  {idx}. {folder}" for idx, folder in enumerate(folders, 1)))
 
     src_idx = prompt_int(f"\nEnter source folder number to process (1-{len(folders)}): ", 1, len(folders)) - 1
 
@@ -223,8 +667,7 @@ def main():
 
     if dest_folder_name not in folders:
         console.print(f"Destination folder '{dest_folder_name}' does not exist. Creating it...", style="yellow")
-        create_script = f'tell application "Notes" to make new folder with properties {{name:"{dest_folder_name}"}}'
-        if run_applescript(create_script) is None:
+        if run_applescript("create_folder", dest_folder_name) is None:
             console.print(f"[red]Failed to create destination folder '{dest_folder_name}'. Exiting.[/]")
             return
         else:
@@ -232,31 +675,31 @@ def main():
 
     console.print(f"\nProcessing notes from '{folders[src_idx]}' to '{dest_folder_name}'...\n", style="bold green")
 
-    notes = list_notes_in_folder(folders[src_idx])
+    notes = get_notes_in_folder(folders[src_idx])
     if not notes:
         console.print(f"[yellow]No notes found in folder '{folders[src_idx]}'.[/]")
         return
 
-    for note_name in notes:
-        console.print(f"Enhancing note: [bold]{note_name}[/] ...")
-        original_body = get_note_body(folders[src_idx], note_name)
-        if not original_body:
-            console.print(f"  [red]Failed to read note '{note_name}'. Skipping.[/]")
-            continue
-
-        enhanced_body = enhance_text_with_perplexity(original_body)
-        if not enhanced_body:
-            console.print(f"  [red]Failed to enhance note '{note_name}'. Skipping.[/]")
-            continue
-
-        new_note_name = f"Enhanced - {note_name}"
-
-        # Format for readability (plain text), then wrap in HTML so Notes preserves breaks
-        readable_text = markdown_to_plain_text(enhanced_body)
-        html_body = to_html_preserving_newlines(readable_text)
-
-        create_note_in_folder_html(dest_folder_name, new_note_name, html_body)
-        console.print(f"  Note '{note_name}' enhanced and saved as '{new_note_name}'.\n", style="green")
+    # Enhancement runs in worker threads; notes are written from this thread
+    # only because Notes.app does not cope well with concurrent writes.
+    _workers_closed.clear()
+    pool = ThreadPoolExecutor(max_workers=args.jobs)
+    try:
+        futures = {pool.submit(process_note, name, body): name for name, body in notes.items()}
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                continue
+            new_note_name, html_body = result
+            create_note_in_folder_html(dest_folder_name, new_note_name, html_body)
+            console.print(f"  Note '{futures[future]}' enhanced and saved as '{new_note_name}'.\n", style="green")
+        pool.shutdown()
+    except BaseException:
+        # Ctrl-C or a failed note: drop the queued notes instead of running them
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        close_perplexity_workers()
 
     console.print("All notes processed. Thank you for using AI Note Cleaner CLI!", style="bold magenta")
 
@@ -0,0 +1,77 @@
+"""
+Persistent driver for the Perplexity CLI.
+
+The CLI has no serve mode, so this script runs it in-process once per request:
+the interpreter and the CLI's imports are paid for once per batch instead of
+once per note.
+
+Protocol over stdin/stdout (UTF-8):
+  ready    = NUL (sent once at startup)
+  request  = prompt NUL
+  response = returncode NUL stdout NUL stderr NUL
+
+Usage: python3 perplexity_worker.py /path/to/perplexity
+"""
+import contextlib
+import io
+import os
+import runpy
+import sys
+import traceback
+
+READ_SIZE = 64 * 1024
+
+
+def run_cli(cli_path, prompt):
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    sys.argv = [cli_path, prompt]
+    # never let the CLI read from the protocol stream
+    sys.stdin = io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            runpy.run_path(cli_path, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                code = 1
+                err.write(str(e.code))
+        except Exception:
+            code = 1
+            traceback.print_exc()
+    return code, out.getvalue(), err.getvalue()
+
+
+def read_requests(stream):
+    pending = b""
+    while True:
+        chunk = stream.read1(READ_SIZE)
+        if not chunk:
+            return
+        pending += chunk
+        *complete, pending = pending.split(b"\0")
+        for raw in complete:
+            yield raw.decode("utf-8")
+
+
+def main():
+    cli_path = sys.argv[1]
+    requests = read_requests(sys.stdin.buffer)
+
+    # Keep the protocol stream private: anything the CLI writes straight to
+    # fd 1 ends up on stderr instead of corrupting a response.
+    proto = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    proto.write(b"\0")
+    proto.flush()
+
+    for prompt in requests:
+        code, out, err = run_cli(cli_path, prompt)
+        fields = (str(code), out.replace("\0", ""), err.replace("\0", ""))
+        proto.write("".join(f + "\0" for f in fields).encode("utf-8"))
+        proto.flush()
+
+
+if __name__ == "__main__":
+    main()
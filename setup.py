@@ -9,10 +9,9 @@ setup(
     packages=find_packages(),
     install_requires=[
         "rich",
-        "markdown",
-        "beautifulsoup4",
-        "markdownify",
-        "tabulate",
+        "prompt_toolkit",
+        "mistune>=3",
+        "macnotesapp; sys_platform == 'darwin'",
     ],
     entry_points={
         "console_scripts": [